@@ -1,10 +1,8 @@
 """FastAPI application exposing resilient reporting endpoints."""
 from __future__ import annotations
 
-import csv
 import hashlib
 import html
-import io
 import json
 import logging
 import os
@@ -13,7 +11,7 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Callable, List, Mapping, Optional, Sequence, Tuple
 
-from fastapi import Body, FastAPI, HTTPException, Query
+from fastapi import Body, Depends, FastAPI, HTTPException, Query
 from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from jsonschema import Draft202012Validator
@@ -39,7 +37,7 @@ except ModuleNotFoundError:  # pragma: no cover - lightweight fallback
 
 from packages.db import ComplianceEvent, EventStore, compliance_session, create_all
 from packages.odoo_client import OdooClient, OdooClientError
-from services.docs import MarkdownLabelGenerator
+from services.docs import LabelDocument, MarkdownLabelGenerator
 from services.compliance import CSV_HEADERS as COMPLIANCE_CSV_HEADERS, resolve_csv_path, serialize_event
 from services.integration.enricher import enrich_decisions
 from services.integration.odoo_service import OdooService
@@ -66,7 +64,10 @@ LabelsPathProvider = Callable[[], Path]
 RecallServiceFactory = Callable[[], Optional[RecallService]]
 FlaggedPathProvider = Callable[[], Path]
 
-_DURATION_RE = re.compile(r"^(?P<value>\d+)(?P<unit>[dhm])$")
+_HEALTH_BYTES = b'{"status":"ok"}'
+_DURATION_RE = re.compile(r"^(?P<value>\d+)(?P<unit>[smhd])$")
+_DURATION_UNIT_SECONDS: dict[str, int] = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+_CSV_QUOTE_RE = re.compile(r'[",\r\n]')
 FLAGGED_CSV_HEADERS: tuple[str, ...] = (
     "default_code",
     "product",
@@ -262,9 +263,9 @@ def create_app(
             "docs": "See README.md for curl examples and Make targets.",
         }
 
-    @app.get("/health", response_class=JSONResponse)
-    def health() -> dict[str, str]:
-        return {"status": "ok"}
+    @app.get("/health")
+    def health() -> Response:
+        return Response(_HEALTH_BYTES, media_type="application/json")
 
     @app.get("/events/recent", response_class=JSONResponse)
     def recent_events(limit: str = Query("100")) -> dict[str, object]:
@@ -300,15 +301,18 @@ def create_app(
         category: str | None = Query(None),
         reason: str | None = Query(None),
     ) -> dict[str, object]:
+        store_filter = (store or "").strip()
+        category_filter = (category or "").strip()
+        reason_filter = (reason or "").strip()
         flagged_path = flagged_provider()
         exists = flagged_path.exists()
         meta: dict[str, object] = {
             "source": str(flagged_path),
             "exists": exists,
             "active_filters": {
-                "store": (store or "").strip(),
-                "category": (category or "").strip(),
-                "reason": (reason or "").strip(),
+                "store": store_filter,
+                "category": category_filter,
+                "reason": reason_filter,
             },
         }
         try:
@@ -351,31 +355,24 @@ def create_app(
             if isinstance(reason_value, str) and reason_value.strip():
                 reasons_set.add(reason_value.strip())
 
-        store_filter = (store or "").strip()
-        category_filter = (category or "").strip()
-        reason_filter = (reason or "").strip()
-
         def _matches(entry: dict[str, object]) -> bool:
-            if store_filter:
-                entry_store = entry.get("store")
+            # Single-field equality checks run before the store check, which may scan a list.
+            if category_filter and entry.get("category") != category_filter:
+                return False
+            if reason_filter and entry.get("reason") != reason_filter:
+                return False
+            if store_filter and entry.get("store") != store_filter:
                 entry_stores = entry.get("stores")
-                matches_primary = isinstance(entry_store, str) and entry_store == store_filter
-                matches_secondary = (
-                    isinstance(entry_stores, Sequence) and any((isinstance(item, str) and item == store_filter) for item in entry_stores)
-                )
-                if not (matches_primary or matches_secondary):
-                    return False
-            if category_filter:
-                category_value = entry.get("category")
-                if not (isinstance(category_value, str) and category_value == category_filter):
+                if isinstance(entry_stores, str) or not isinstance(entry_stores, Sequence):
                     return False
-            if reason_filter:
-                reason_value = entry.get("reason")
-                if not (isinstance(reason_value, str) and reason_value == reason_filter):
+                if store_filter not in entry_stores:
                     return False
             return True
 
-        filtered = [entry for entry in records if _matches(entry)]
+        if store_filter or category_filter or reason_filter:
+            filtered = [entry for entry in records if _matches(entry)]
+        else:
+            filtered = list(records)
         filtered.sort(
             key=lambda item: (
                 str(item.get("store") or ""),
@@ -1491,6 +1488,7 @@ def create_app(
         limit: int = Query(100, ge=1, le=1000),
         type: str | None = Query(None),
         since: str | None = Query(None),
+        now: datetime = Depends(_now),
     ) -> dict[str, object]:
         event_type = type
         meta: dict[str, object] = {
@@ -1500,7 +1498,7 @@ def create_app(
             "since": since,
         }
         try:
-            since_dt = _parse_since(since)
+            since_dt = _parse_since(since, reference=now)
         except ValueError as exc:
             raise HTTPException(400, {"since": str(exc)}) from exc
 
@@ -1523,6 +1521,7 @@ def create_app(
         code: str | None = Query(None),
         store: str | None = Query(None),
         limit: int = Query(100, ge=1, le=500),
+        now: datetime = Depends(_now),
     ) -> List[dict[str, object]]:
         try:
             create_all()
@@ -1531,7 +1530,7 @@ def create_app(
             raise HTTPException(500, {"detail": "compliance_setup_failed"}) from None
 
         try:
-            since_dt = _parse_since(since)
+            since_dt = _parse_since(since, reference=now)
         except ValueError as exc:
             raise HTTPException(400, {"since": str(exc)}) from exc
 
@@ -1598,9 +1597,10 @@ def create_app(
         type: str | None = Query(None),
         since: str | None = Query(None),
         api_key: str | None = Query(None),
+        now: datetime = Depends(_now),
     ) -> Response:
         _require_api_key(api_key)
-        result = events(limit=limit, type=type, since=since)
+        result = events(limit=limit, type=type, since=since, now=now)
         entries = result.get("events", [])
         rows = _serialize_events_csv_rows(entries)
         csv_text = _render_csv(rows, EVENTS_CSV_HEADERS)
@@ -1690,7 +1690,7 @@ def create_app(
         return {"items": payload, "meta": {"count": len(payload)}}
 
     @app.get("/at-risk", response_class=JSONResponse)
-    def at_risk(days: str = Query("3")) -> dict[str, object]:
+    def at_risk(days: str = Query("3"), now: datetime = Depends(_now)) -> dict[str, object]:
         days_value, clamped = _coerce_int(days, default=3, minimum=1, maximum=30)
         meta: dict[str, object] = {"days": days_value, "clamped": clamped}
 
@@ -1736,7 +1736,7 @@ def create_app(
             app_logger.exception("Unexpected error loading inventory snapshot")
             return {"items": [], "meta": meta}
 
-        items = calculate_at_risk(snapshot, threshold_days=days_value)
+        items = calculate_at_risk(snapshot, today=now.astimezone().date(), threshold_days=days_value)
         payload = serialize_at_risk(items)
         meta["count"] = len(payload)
         return {"items": payload, "meta": meta}
@@ -1789,10 +1789,7 @@ def create_app(
 
         if combined:
             labels_root = output_dir.resolve()
-            cache_key = "|".join(codes)
-            cache_hash = hashlib.sha1(cache_key.encode("utf-8")).hexdigest()[:12]
-            combined_filename = f"labels-combined-{len(codes)}-{cache_hash}.pdf"
-            combined_path = labels_root / combined_filename
+            combined_path = labels_root / _combined_labels_filename(documents)
             if not combined_path.exists():
                 try:
                     combined_payload = generator.render_combined_pdf(documents)
@@ -1927,17 +1924,24 @@ def _serialize_events_csv_rows(entries: Sequence[Mapping[str, object]]) -> list[
 
 
 def _render_csv(rows: Sequence[Mapping[str, str]], headers: Sequence[str]) -> str:
-    buffer = io.StringIO()
-    writer = csv.DictWriter(
-        buffer,
-        fieldnames=list(headers),
-        extrasaction="ignore",
-        lineterminator="\r\n",
-    )
-    writer.writeheader()
-    for row in rows:
-        writer.writerow({key: row.get(key, "") for key in headers})
-    return buffer.getvalue()
+    """Render rows as CRLF-terminated CSV matching ``csv.DictWriter`` minimal quoting."""
+
+    lines = [_csv_line(headers)]
+    lines.extend(_csv_line([row.get(key, "") for key in headers]) for row in rows)
+    return "".join(lines)
+
+
+def _csv_line(values: Sequence[str]) -> str:
+    if len(values) == 1 and values[0] == "":
+        # A lone empty field must be quoted, otherwise the row reads back as blank.
+        return '""\r\n'
+    return ",".join([_csv_field(value) for value in values]) + "\r\n"
+
+
+def _csv_field(value: str) -> str:
+    if _CSV_QUOTE_RE.search(value) is None:
+        return value
+    return '"' + value.replace('"', '""') + '"'
 
 
 def _csv_response(text: str, *, filename: str) -> Response:
@@ -2026,6 +2030,12 @@ def _resolve_expiry_field(client: OdooClient) -> str | None:
     return None
 
 
+def _now() -> datetime:
+    """Request-scoped clock shared by handlers that resolve relative times."""
+
+    return datetime.now(timezone.utc)
+
+
 def _parse_since(value: str | None, *, reference: datetime | None = None) -> datetime | None:
     if value is None:
         return None
@@ -2036,15 +2046,8 @@ def _parse_since(value: str | None, *, reference: datetime | None = None) -> dat
     ref = reference or datetime.now(timezone.utc)
     match = _DURATION_RE.fullmatch(raw.lower())
     if match:
-        amount = int(match.group("value"))
-        unit = match.group("unit")
-        if unit == "d":
-            delta = timedelta(days=amount)
-        elif unit == "h":
-            delta = timedelta(hours=amount)
-        else:
-            delta = timedelta(minutes=amount)
-        return ref - delta
+        seconds = int(match.group("value")) * _DURATION_UNIT_SECONDS[match.group("unit")]
+        return ref - timedelta(seconds=seconds)
 
     try:
         normalized = raw.replace("Z", "+00:00")
@@ -2147,6 +2150,20 @@ def _labels_directory_listing(directory: Path) -> dict[str, object]:
     }
 
 
+def _combined_labels_filename(documents: Sequence[LabelDocument]) -> str:
+    """Name a combined label PDF after the codes and product data it renders."""
+
+    fingerprint = json.dumps(
+        [
+            [doc.default_code, doc.product_name, doc.category, doc.description, doc.barcode, doc.found]
+            for doc in documents
+        ],
+        separators=(",", ":"),
+    )
+    cache_hash = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:12]
+    return f"labels-combined-{len(documents)}-{cache_hash}.pdf"
+
+
 def _serialize_recall_result(result: RecallResult) -> dict[str, object]:
     return {
         "product": result.product,
@@ -1,18 +1,24 @@
 """Data loading utilities for the reporting web app."""
 from __future__ import annotations
 
+import copy
 from functools import lru_cache
 import heapq
 import itertools
 import json
 import os
 from dataclasses import dataclass
-from datetime import date, datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 from typing import Iterable, List, Mapping, MutableMapping, Protocol, Sequence, Tuple
 
 from services.simulator.inventory import InventorySnapshot, QuantRecord
 
+try:  # pragma: no cover - optional dependency
+    import orjson  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    orjson = None
+
 DEFAULT_EVENTS_PATH = Path(os.getenv("FOODFLOW_EVENTS_PATH", "out/events.jsonl"))
 DEFAULT_FLAGGED_PATH = Path(os.getenv("FOODFLOW_FLAGGED_PATH", "out/flagged.json"))
 FALLBACK_CASE_UNITS = 12.0
@@ -34,9 +40,31 @@ _CATEGORY_WEIGHT_FACTORS: dict[str, float] = {
     "Deli": 1.0,
     "All / Saleable / Deli": 1.0,
 }
+_fromiso = datetime.fromisoformat
+
+
+def _loads(data: str | bytes) -> object:
+    """Decode JSON with orjson when installed, falling back to ``json.loads``.
+
+    ``json.dumps`` writes ``NaN``/``Infinity`` by default and orjson rejects them, so
+    lines orjson refuses are retried with the stdlib parser to keep both paths in step.
+    """
+
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
 
+# Parsed flagged decisions keyed by path, invalidated by (size, mtime_ns) and
+# capped at _FLAGGED_CACHE_SIZE paths with the least recently parsed evicted first.
+_FLAGGED_CACHE_SIZE = 8
+_FLAGGED_CACHE: dict[Path, Tuple[Tuple[int, int], List[dict[str, object]]]] = {}
 
-@dataclass
+
+@dataclass(slots=True)
 class EventRecord:
     """Representation of a simulator event for display."""
 
@@ -65,7 +93,7 @@ class EventRecord:
         if not isinstance(ts_raw, str):
             return None
         try:
-            ts = datetime.fromisoformat(ts_raw.replace("Z", "+00:00"))
+            ts = _fromiso(ts_raw.replace("Z", "+00:00"))
         except ValueError:
             return None
         return cls(
@@ -79,7 +107,7 @@ class EventRecord:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class AtRiskItem:
     """Inventory item approaching or past expiry."""
 
@@ -120,7 +148,7 @@ def load_recent_events(path: Path | None = None, limit: int = 20) -> List[EventR
                 if not line:
                     continue
                 try:
-                    payload = json.loads(line)
+                    payload = _loads(line)
                 except json.JSONDecodeError as exc:
                     raise ValueError(f"Failed to parse JSON in {events_path}") from exc
                 if not isinstance(payload, Mapping):
@@ -149,27 +177,25 @@ def calculate_at_risk(
     """Compute items that are within ``threshold_days`` of their expiry."""
 
     current_day = today or date.today()
-    items: List[AtRiskItem] = []
-    for quant in snapshot.quants():
-        if quant.life_date is None:
-            continue
-        days_until = (quant.life_date - current_day).days
-        if days_until > threshold_days:
-            continue
-        if quant.quantity <= 0:
-            continue
-        items.append(
-            AtRiskItem(
-                product=quant.product_name,
-                default_code=quant.default_code,
-                lot=quant.lot_name,
-                life_date=quant.life_date,
-                days_until=days_until,
-                quantity=quant.quantity,
-            )
+    cutoff = current_day + timedelta(days=threshold_days)
+    matches = [
+        quant
+        for quant in snapshot.quants()
+        if quant.life_date is not None and quant.life_date <= cutoff and quant.quantity > 0
+    ]
+    # Days until expiry is monotonic in life_date, so this matches sorting by days first.
+    matches.sort(key=lambda quant: (quant.life_date, quant.product_name))
+    return [
+        AtRiskItem(
+            product=quant.product_name,
+            default_code=quant.default_code,
+            lot=quant.lot_name,
+            life_date=quant.life_date,
+            days_until=(quant.life_date - current_day).days,
+            quantity=quant.quantity,
         )
-    items.sort(key=lambda item: (item.days_until, item.life_date, item.product))
-    return items
+        for quant in matches
+    ]
 
 
 def snapshot_from_quants(quants: Iterable[QuantRecord]) -> InventorySnapshot:
@@ -227,20 +253,26 @@ def load_flagged_decisions(path: Path | None = None) -> List[dict[str, object]]:
     if not flagged_path.exists():
         return []
     try:
-        text = flagged_path.read_text(encoding="utf-8")
+        stat = flagged_path.stat()
+        version = (stat.st_size, stat.st_mtime_ns)
+        cached = _FLAGGED_CACHE.get(flagged_path)
+        if cached is not None and cached[0] == version:
+            return copy.deepcopy(cached[1])
+        payload = flagged_path.read_bytes()
     except OSError as exc:
         raise OSError(f"Failed to read flagged decisions from {flagged_path}") from exc
     try:
-        data = json.loads(text)
-    except json.JSONDecodeError as exc:
+        data = _loads(payload)
+    except (json.JSONDecodeError, UnicodeDecodeError) as exc:
         raise ValueError(f"Flagged decisions file {flagged_path} contains invalid JSON") from exc
     if not isinstance(data, list):
         raise ValueError("Flagged decisions file must contain a list of records")
-    records: List[dict[str, object]] = []
-    for entry in data:
-        if isinstance(entry, Mapping):
-            records.append(dict(entry))
-    return records
+    entries = [dict(entry) for entry in data if isinstance(entry, Mapping)]
+    _FLAGGED_CACHE.pop(flagged_path, None)
+    while len(_FLAGGED_CACHE) >= _FLAGGED_CACHE_SIZE:
+        del _FLAGGED_CACHE[next(iter(_FLAGGED_CACHE))]
+    _FLAGGED_CACHE[flagged_path] = (version, entries)
+    return copy.deepcopy(entries)
 
 
 def calculate_impact_metrics(records: Sequence[Mapping[str, object]]) -> dict[str, object]:
@@ -254,11 +286,13 @@ def calculate_impact_metrics(records: Sequence[Mapping[str, object]]) -> dict[st
 
     for record in records:
         outcome = str(record.get("outcome") or "").upper()
+        # Only markdowns and donations contribute, so skip other outcomes before resolving units.
+        if outcome != "MARKDOWN" and outcome != "DONATE":
+            continue
         code = str(record.get("default_code") or "").strip()
         quantity, uom = _resolve_quantity_and_uom(record, code, uoms)
         if quantity is None or quantity <= 0:
             continue
-        category = str(record.get("category") or "").strip() or None
         if outcome == "MARKDOWN":
             price = _resolve_unit_price(record, code, prices)
             if price is None or price <= 0:
@@ -266,7 +300,8 @@ def calculate_impact_metrics(records: Sequence[Mapping[str, object]]) -> dict[st
             factor = _resolve_discount_factor(record)
             diverted_value += quantity * price * factor
             markdown_count += 1
-        elif outcome == "DONATE":
+        else:
+            category = str(record.get("category") or "").strip() or None
             pounds = _convert_to_pounds(quantity, uom, category)
             if pounds <= 0:
                 continue
@@ -20,6 +20,8 @@ class Response:
 
     @property
     def text(self) -> str:
+        if isinstance(self.content, (bytes, bytearray)):
+            return bytes(self.content).decode("utf-8")
         return str(self.content)
 
     @property
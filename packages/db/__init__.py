@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from .core import connect, db_session, ensure_db_path, get_db_path
+from .core import MEMORY_DB_PATH, connect, db_session, ensure_db_path, get_db_path, is_memory_path
 from .events import EventStore, InventoryEvent
 from .models import (
     Base,
@@ -19,6 +19,8 @@ __all__ = [
     "db_session",
     "ensure_db_path",
     "get_db_path",
+    "is_memory_path",
+    "MEMORY_DB_PATH",
     "EventStore",
     "InventoryEvent",
     "Base",
@@ -8,6 +8,7 @@ from pathlib import Path
 from typing import Iterator
 
 DEFAULT_DB_PATH = Path(os.getenv("FOODFLOW_DB_PATH", "out/foodflow.db"))
+MEMORY_DB_PATH = ":memory:"
 
 
 def get_db_path() -> Path:
@@ -19,7 +20,7 @@ def get_db_path() -> Path:
     return DEFAULT_DB_PATH
 
 
-def ensure_db_path(path: Path | None = None) -> Path:
+def ensure_db_path(path: Path | str | None = None) -> Path:
     """Ensure the database directory exists and return the absolute path."""
 
     db_path = Path(path or get_db_path())
@@ -27,18 +28,27 @@ def ensure_db_path(path: Path | None = None) -> Path:
     return db_path
 
 
-def connect(path: Path | None = None) -> sqlite3.Connection:
+def is_memory_path(path: Path | str | None) -> bool:
+    """Return True when ``path`` refers to a private in-memory SQLite database."""
+
+    return path is not None and str(path) == MEMORY_DB_PATH
+
+
+def connect(path: Path | str | None = None) -> sqlite3.Connection:
     """Create a sqlite3 connection with sensible defaults."""
 
-    db_path = ensure_db_path(path)
-    conn = sqlite3.connect(str(db_path))
+    target = MEMORY_DB_PATH if is_memory_path(path) else str(ensure_db_path(path))
+    conn = sqlite3.connect(target)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON")
+    # NORMAL is only crash-safe under WAL; rollback-journal databases keep the FULL default.
+    if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+        conn.execute("PRAGMA synchronous = NORMAL")
     return conn
 
 
 @contextmanager
-def db_session(path: Path | None = None) -> Iterator[sqlite3.Connection]:
+def db_session(path: Path | str | None = None) -> Iterator[sqlite3.Connection]:
     """Context manager that commits on success and closes the connection."""
 
     conn = connect(path)
@@ -49,4 +59,12 @@ def db_session(path: Path | None = None) -> Iterator[sqlite3.Connection]:
         conn.close()
 
 
-__all__ = ["connect", "db_session", "ensure_db_path", "get_db_path", "DEFAULT_DB_PATH"]
+__all__ = [
+    "connect",
+    "db_session",
+    "ensure_db_path",
+    "get_db_path",
+    "is_memory_path",
+    "DEFAULT_DB_PATH",
+    "MEMORY_DB_PATH",
+]
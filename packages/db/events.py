@@ -1,15 +1,17 @@
 """Inventory event persistence helpers."""
 from __future__ import annotations
 
+import sqlite3
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence
+from typing import Iterable, Iterator, List, Optional, Sequence
 
-from .core import db_session
+from .core import connect, db_session, is_memory_path
 
 
-@dataclass
+@dataclass(slots=True)
 class InventoryEvent:
     """Representation of an inventory event row."""
 
@@ -48,24 +50,55 @@ class InventoryEvent:
 
 
 class EventStore:
-    """Read and write inventory events."""
-
-    def __init__(self, db_path: Path | None = None) -> None:
+    """Read and write inventory events.
+
+    Passing ``":memory:"`` as ``db_path`` keeps a single in-memory connection open
+    for the lifetime of the store so rows survive between calls; call :meth:`close`
+    to release it. An existing
+    ``sqlite3.Connection`` is used as-is, which lets callers migrate and populate
+    an in-memory database on the same connection the store reads from.
+    """
+
+    def __init__(self, db_path: Path | str | sqlite3.Connection | None = None) -> None:
+        if isinstance(db_path, sqlite3.Connection):
+            db_path.row_factory = sqlite3.Row
+            self.db_path: Path | str | None = None
+            self._connection: sqlite3.Connection | None = db_path
+            self._owns_connection = False
+            return
         self.db_path = db_path
+        self._connection = connect(db_path) if is_memory_path(db_path) else None
+        self._owns_connection = self._connection is not None
+
+    def close(self) -> None:
+        """Close the in-memory connection opened by this store; caller-owned connections stay open."""
+
+        if self._owns_connection and self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    @contextmanager
+    def _session(self) -> Iterator[sqlite3.Connection]:
+        if self._connection is None:
+            with db_session(self.db_path) as conn:
+                yield conn
+            return
+        with self._connection:
+            yield self._connection
 
     def add_events(self, events: Iterable[InventoryEvent]) -> int:
         payload = [event.as_db_params() for event in events]
         if not payload:
             return 0
-        with db_session(self.db_path) as conn:
-            conn.executemany(
+        with self._session() as conn:
+            cursor = conn.executemany(
                 """
                 INSERT INTO inventory_events (ts, type, product, lot, qty, before_qty, after_qty, source)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 payload,
             )
-            return conn.total_changes
+            return cursor.rowcount
 
     def list_events(
         self,
@@ -89,13 +122,13 @@ class EventStore:
         query.append("LIMIT ?")
         params.append(int(limit))
         sql = " ".join(query)
-        with db_session(self.db_path) as conn:
+        with self._session() as conn:
             cursor = conn.execute(sql, params)
             rows = cursor.fetchall()
         return [InventoryEvent.from_row(row) for row in rows]
 
     def metrics_summary(self) -> dict[str, object]:
-        with db_session(self.db_path) as conn:
+        with self._session() as conn:
             totals_row = conn.execute("SELECT COUNT(*) AS total FROM inventory_events").fetchone()
             by_type_cursor = conn.execute(
                 "SELECT type, COUNT(*) AS count FROM inventory_events GROUP BY type ORDER BY type"
@@ -109,7 +142,7 @@ class EventStore:
 
         ts_value = timestamp.astimezone(timezone.utc).isoformat()
         updated_value = datetime.now(timezone.utc).isoformat()
-        with db_session(self.db_path) as conn:
+        with self._session() as conn:
             conn.execute(
                 """
                 INSERT INTO integration_runs (id, last_sync, updated_at)
@@ -122,7 +155,7 @@ class EventStore:
     def get_last_integration_sync(self) -> datetime | None:
         """Return the timestamp of the most recent integration sync if recorded."""
 
-        with db_session(self.db_path) as conn:
+        with self._session() as conn:
             row = conn.execute("SELECT last_sync FROM integration_runs WHERE id = 1").fetchone()
         if row is None:
             return None
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import argparse
 import logging
+import sqlite3
 from pathlib import Path
 
 from packages.db import create_all, db_session, ensure_db_path, get_db_path
@@ -33,21 +34,30 @@ CREATE TABLE IF NOT EXISTS integration_runs (
 )
 """
 
+# WAL is persisted in the database file, so every later connection benefits.
+ENABLE_WAL = "PRAGMA journal_mode = WAL"
 CREATE_TS_INDEX = "CREATE INDEX IF NOT EXISTS idx_inventory_events_ts ON inventory_events (ts)"
 CREATE_TYPE_TS_INDEX = (
     "CREATE INDEX IF NOT EXISTS idx_inventory_events_type_ts ON inventory_events (type, ts)"
 )
 
 
+def apply_event_schema(conn: sqlite3.Connection) -> None:
+    """Create the raw-SQL event tables and indexes on an open connection."""
+
+    conn.execute(CREATE_EVENTS_TABLE)
+    conn.execute(CREATE_INTEGRATION_RUNS_TABLE)
+    conn.execute(CREATE_TS_INDEX)
+    conn.execute(CREATE_TYPE_TS_INDEX)
+
+
 def run(db_path: Path | None = None) -> Path:
     """Execute migrations and return the database path."""
 
     target_path = ensure_db_path(db_path)
     with db_session(target_path) as conn:
-        conn.execute(CREATE_EVENTS_TABLE)
-        conn.execute(CREATE_INTEGRATION_RUNS_TABLE)
-        conn.execute(CREATE_TS_INDEX)
-        conn.execute(CREATE_TYPE_TS_INDEX)
+        conn.execute(ENABLE_WAL)
+        apply_event_schema(conn)
     try:
         create_all(target_path)
     except Exception:
@@ -7,7 +7,13 @@ from .config import (
     load_config,
 )
 from .enricher import enrich_decisions
-from .fixtures import InventoryFixture, fixtures_as_dicts, fixtures_to_snapshot, load_inventory_fixtures
+from .fixtures import (
+    InventoryFixture,
+    InventoryFixtureSet,
+    fixtures_as_dicts,
+    fixtures_to_snapshot,
+    load_inventory_fixtures,
+)
 from .movements import MovementEvent, generate_fake_movements, movements_as_dicts
 from .odoo_service import IntegrationCycleResult, OdooService
 from .shrink_detector import detect_flags, flag_low_movement, flag_near_expiry, flag_overstock
@@ -20,6 +26,7 @@ __all__ = [
     "OdooService",
     "enrich_decisions",
     "InventoryFixture",
+    "InventoryFixtureSet",
     "MovementEvent",
     "fixtures_as_dicts",
     "fixtures_to_snapshot",
@@ -1,10 +1,12 @@
 """Static inventory fixtures used for demos and offline simulations."""
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections.abc import Sequence
+from dataclasses import dataclass, field
 from datetime import date, timedelta
 from functools import lru_cache
-from typing import Iterable, List, Sequence
+from types import MappingProxyType
+from typing import Iterable, Iterator, List, Mapping, overload
 
 from services.simulator.inventory import InventorySnapshot, QuantRecord
 
@@ -136,12 +138,49 @@ class InventoryFixture:
         )
 
 
-def load_inventory_fixtures(base_date: date | None = None) -> List[InventoryFixture]:
+@dataclass(frozen=True)
+class InventoryFixtureSet(Sequence[InventoryFixture]):
+    """Immutable fixture sequence with demand-profile and perishability indexes built once on load."""
+
+    fixtures: tuple[InventoryFixture, ...] = ()
+    by_demand: Mapping[str, tuple[InventoryFixture, ...]] = field(init=False, repr=False, compare=False)
+    perishables: tuple[InventoryFixture, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        fixtures = tuple(self.fixtures)
+        by_demand: dict[str, list[InventoryFixture]] = {}
+        for fixture in fixtures:
+            by_demand.setdefault(fixture.demand_profile, []).append(fixture)
+        object.__setattr__(self, "fixtures", fixtures)
+        object.__setattr__(
+            self, "by_demand", MappingProxyType({profile: tuple(items) for profile, items in by_demand.items()})
+        )
+        object.__setattr__(self, "perishables", tuple(fixture for fixture in fixtures if fixture.perishable))
+
+    def __len__(self) -> int:
+        return len(self.fixtures)
+
+    def __iter__(self) -> Iterator[InventoryFixture]:
+        return iter(self.fixtures)
+
+    @overload
+    def __getitem__(self, index: int) -> InventoryFixture: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "InventoryFixtureSet": ...
+
+    def __getitem__(self, index: int | slice) -> "InventoryFixture | InventoryFixtureSet":
+        if isinstance(index, slice):
+            return InventoryFixtureSet(self.fixtures[index])
+        return self.fixtures[index]
+
+
+def load_inventory_fixtures(base_date: date | None = None) -> InventoryFixtureSet:
     """Generate inventory fixtures with stock, shelf life, and supplier data."""
 
     catalog = _load_product_catalog()
     if not catalog:
-        return []
+        return InventoryFixtureSet()
 
     today = base_date or date.today()
     fixtures: List[InventoryFixture] = []
@@ -201,7 +240,7 @@ def load_inventory_fixtures(base_date: date | None = None) -> List[InventoryFixt
             )
         )
 
-    return fixtures
+    return InventoryFixtureSet(fixtures)
 
 
 def fixtures_to_snapshot(fixtures: Sequence[InventoryFixture]) -> InventorySnapshot:
@@ -264,6 +303,7 @@ def _derive_quantities(perishable: bool, demand_profile: str, index: int) -> tup
 
 __all__ = [
     "InventoryFixture",
+    "InventoryFixtureSet",
     "fixtures_as_dicts",
     "fixtures_to_snapshot",
     "load_inventory_fixtures",
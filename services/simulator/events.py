@@ -6,7 +6,7 @@ import logging
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
 
 from packages.db import EventStore, InventoryEvent
 
@@ -64,10 +64,7 @@ class EventWriter:
             return
 
         payloads: Sequence[Mapping[str, object]] = [event.to_payload() for event in buffered_events]
-        with self.path.open("a", encoding="utf-8") as handle:
-            for payload in payloads:
-                handle.write(_json_line(payload))
-                handle.write("\n")
+        self._append_lines([_json_line(payload) for payload in payloads])
 
         if self.store:
             inventory_events = [event.to_inventory_event() for event in buffered_events]
@@ -76,6 +73,17 @@ class EventWriter:
             except Exception:
                 LOGGER.exception("Failed to persist events to database")
 
+    def history(self) -> "EventHistory":
+        """Return a reader over the events appended by this writer."""
+
+        return EventHistory(self.path)
+
+    def _append_lines(self, lines: Sequence[str]) -> None:
+        with self.path.open("a", encoding="utf-8") as handle:
+            for line in lines:
+                handle.write(line)
+                handle.write("\n")
+
 
 class EventHistory:
     """Utility to derive aggregates from the simulator event log."""
@@ -87,24 +95,21 @@ class EventHistory:
         """Return the remaining quantity that may be returned per product name."""
 
         totals: Dict[str, Dict[str, float]] = {}
-        if not self.path.exists():
-            return {}
         try:
-            with self.path.open("r", encoding="utf-8") as handle:
-                for line in handle:
-                    record = _parse_json_line(line)
-                    if not record or record.get("source") != "simulator":
-                        continue
-                    product = str(record.get("product"))
-                    if not product:
-                        continue
-                    event_type = record.get("type")
-                    qty = float(record.get("qty", 0.0) or 0.0)
-                    entry = totals.setdefault(product, {"sold": 0.0, "returned": 0.0})
-                    if event_type == "sell_down":
-                        entry["sold"] += max(-qty, 0.0)
-                    elif event_type == "returns":
-                        entry["returned"] += max(qty, 0.0)
+            for line in self._lines():
+                record = _parse_json_line(line)
+                if not record or record.get("source") != "simulator":
+                    continue
+                product = str(record.get("product"))
+                if not product:
+                    continue
+                event_type = record.get("type")
+                qty = float(record.get("qty", 0.0) or 0.0)
+                entry = totals.setdefault(product, {"sold": 0.0, "returned": 0.0})
+                if event_type == "sell_down":
+                    entry["sold"] += max(-qty, 0.0)
+                elif event_type == "returns":
+                    entry["returned"] += max(qty, 0.0)
         except OSError:
             LOGGER.exception("Failed to read simulator event history from %s", self.path)
             return {}
@@ -115,6 +120,12 @@ class EventHistory:
                 outstanding[product] = remaining
         return outstanding
 
+    def _lines(self) -> Iterator[str]:
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8") as handle:
+            yield from handle
+
 
 def _json_line(payload: Mapping[str, object]) -> str:
     # Avoid bringing in the json module for a single dump - implement minimal writer
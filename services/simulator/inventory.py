@@ -8,7 +8,7 @@ from typing import Dict, Iterable, List, Mapping, Optional, Sequence
 from packages.odoo_client import OdooClient
 
 
-@dataclass
+@dataclass(slots=True)
 class QuantRecord:
     """Represents a stock quant with resolved relationships."""
 
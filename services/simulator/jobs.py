@@ -7,7 +7,7 @@ from datetime import date, datetime, timedelta, timezone
 from typing import Iterable, List, Optional, Sequence, Tuple
 
 from .config import PerishabilityConfig, RateConfig
-from .events import EventHistory, SimulatorEvent
+from .events import SimulatorEvent
 from .inventory import InventorySnapshot
 
 
@@ -79,7 +79,7 @@ class ReturnsJob(BaseJob):
         self.config = config
         self.writer = writer
         self.client = client
-        self.history = EventHistory(writer.path)
+        self.history = writer.history()
         self.rng = rng or random.Random()
 
     def run(self, context: JobContext) -> Sequence[SimulatorEvent]:
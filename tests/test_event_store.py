@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from packages.db import MEMORY_DB_PATH, EventStore, InventoryEvent, db_session
+from scripts.db_migrate import apply_event_schema, run as run_migration
+
+
+@pytest.mark.parametrize("has_since", [False, True])
+@pytest.mark.parametrize("has_type", [False, True])
+def test_list_events_queries_use_index_without_sorting(tmp_path: Path, has_type: bool, has_since: bool) -> None:
+    db_path = run_migration(tmp_path / "events.db")
+    statements: list[str] = []
+    with sqlite3.connect(db_path) as conn:
+        conn.set_trace_callback(statements.append)
+        EventStore(conn).list_events(
+            event_type="receiving" if has_type else None,
+            since=datetime(2024, 1, 1, tzinfo=timezone.utc) if has_since else None,
+            limit=10,
+        )
+        conn.set_trace_callback(None)
+        query = next(statement for statement in statements if statement.startswith("SELECT"))
+        plan = conn.execute("EXPLAIN QUERY PLAN " + query).fetchall()
+    details = " ".join(str(row[-1]) for row in plan)
+
+    assert "USING INDEX idx_inventory_events_" in details
+    assert "TEMP B-TREE" not in details
+
+
+def test_event_store_reads_through_a_caller_owned_connection() -> None:
+    conn = sqlite3.connect(MEMORY_DB_PATH)
+    apply_event_schema(conn)
+    store = EventStore(conn)
+    event = InventoryEvent(
+        ts=datetime(2024, 1, 10, 12, 0, tzinfo=timezone.utc),
+        type="receiving",
+        product="Gala Apples",
+        lot=None,
+        qty=5.0,
+        before=10.0,
+        after=15.0,
+    )
+
+    assert store.add_events([event]) == 1
+    assert conn.execute("SELECT COUNT(*) FROM inventory_events").fetchone()[0] == 1
+    assert store.list_events() == [event]
+
+
+def test_migration_enables_wal_and_relaxes_synchronous_only_under_wal(tmp_path: Path) -> None:
+    db_path = run_migration(tmp_path / "events.db")
+    with db_session(db_path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+
+    with db_session(tmp_path / "plain.db") as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 2
+
+
+def test_close_releases_only_connections_the_store_opened() -> None:
+    owned = EventStore(MEMORY_DB_PATH)
+    owned.close()
+    owned.close()
+
+    conn = sqlite3.connect(MEMORY_DB_PATH)
+    EventStore(conn).close()
+    assert conn.execute("SELECT 1").fetchone()[0] == 1
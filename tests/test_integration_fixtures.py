@@ -45,10 +45,19 @@ def test_fixtures_convert_to_snapshot_with_expected_quantities() -> None:
     assert first_quant.lot_name == first_fixture.lot_name
 
 
+def test_fixture_set_indexes_demand_profile_and_perishables() -> None:
+    fixtures = _select_fixtures()
+
+    assert fixtures.perishables == tuple(item for item in fixtures if item.perishable)
+    for profile, items in fixtures.by_demand.items():
+        assert items == tuple(item for item in fixtures if item.demand_profile == profile)
+    assert sum(len(items) for items in fixtures.by_demand.values()) == len(fixtures)
+
+
 def test_generate_fake_movements_is_deterministic_and_sorted() -> None:
     fixtures = _select_fixtures()
-    perishables = [item for item in fixtures if item.perishable][:3]
-    low_demand = [item for item in fixtures if item.demand_profile == "low"][:2]
+    perishables = fixtures.perishables[:3]
+    low_demand = fixtures.by_demand.get("low", ())[:2]
     selected = perishables + low_demand
 
     events_a = generate_fake_movements(
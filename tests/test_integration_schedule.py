@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import json
+from contextlib import ExitStack
 from pathlib import Path
 from types import SimpleNamespace
 from typing import cast
 from unittest.mock import patch
 
+import pytest
 from fastapi.testclient import TestClient
 
 from services.integration.config import IntegrationConfig
@@ -42,7 +44,49 @@ def test_flagged_store_ignores_invalid_existing_file(tmp_path) -> None:
     assert store.current() == []
 
 
-def test_detection_runner_updates_store_with_decisions(tmp_path) -> None:
+@pytest.mark.parametrize(
+    ("flag_payload", "expected_record"),
+    [
+        pytest.param(
+            {
+                "reason": "near_expiry",
+                "product": "Gala Apples",
+                "default_code": "FF101",
+                "category": "Produce",
+                "locations": ["Downtown / Front"],
+                "quantity": 3.5,
+                "life_date": "2024-01-31",
+            },
+            {
+                "outcome": "MARKDOWN",
+                "reason": "near_expiry",
+                "default_code": "FF101",
+                "product": "Gala Apples",
+                "category": "Produce",
+                "store": "Downtown",
+                "stores": ["Downtown"],
+                "quantity": 3.5,
+            },
+            id="enriched_with_store",
+        ),
+        pytest.param(
+            {"reason": "near_expiry", "default_code": "FF101"},
+            {
+                "outcome": "MARKDOWN",
+                "reason": "near_expiry",
+                "default_code": "FF101",
+                "store": "Unassigned",
+                "stores": [],
+            },
+            id="simple_decision",
+        ),
+    ],
+)
+def test_detection_runner_updates_store_with_decisions(
+    tmp_path,
+    flag_payload: dict[str, object],
+    expected_record: dict[str, object],
+) -> None:
     path = Path(tmp_path) / "flagged.json"
     store = FlaggedStore(path)
     args = DetectionArgs(
@@ -58,38 +102,29 @@ def test_detection_runner_updates_store_with_decisions(tmp_path) -> None:
         map_flags=lambda flags: [SimpleNamespace(to_dict=lambda: decision_payload)]
     )
 
-    flag_payload = {
-        "reason": "near_expiry",
-        "product": "Gala Apples",
-        "default_code": "FF101",
-        "category": "Produce",
-        "locations": ["Downtown / Front"],
-        "quantity": 3.5,
-        "life_date": "2024-01-31",
-    }
-
-    with patch("services.integration.schedule.load_config", return_value=IntegrationConfig()):
-        with patch("services.integration.schedule.detect_flags", return_value=[flag_payload]):
-            with patch("services.integration.schedule.DecisionMapper.from_path", return_value=mapper):
-                runner = DetectionRunner(
-                    store=store,
-                    config_path=Path("config.yaml"),
-                    policy_path=Path("policy.yaml"),
-                    detection_args=args,
-                )
-                runner.execute()
+    with ExitStack() as stack:
+        stack.enter_context(
+            patch("services.integration.schedule.load_config", return_value=IntegrationConfig())
+        )
+        stack.enter_context(
+            patch("services.integration.schedule.detect_flags", return_value=[flag_payload])
+        )
+        stack.enter_context(
+            patch("services.integration.schedule.DecisionMapper.from_path", return_value=mapper)
+        )
+        runner = DetectionRunner(
+            store=store,
+            config_path=Path("config.yaml"),
+            policy_path=Path("policy.yaml"),
+            detection_args=args,
+        )
+        runner.execute()
 
     payload = store.current()
     assert len(payload) == 1
     record = payload[0]
-    assert record["outcome"] == "MARKDOWN"
-    assert record["reason"] == "near_expiry"
-    assert record["default_code"] == "FF101"
-    assert record["product"] == "Gala Apples"
-    assert record["category"] == "Produce"
-    assert record["store"] == "Downtown"
-    assert record["stores"] == ["Downtown"]
-    assert record["quantity"] == 3.5
+    for key, value in expected_record.items():
+        assert record[key] == value
 
 
 def test_create_app_returns_flagged_payload(tmp_path) -> None:
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Iterable, List, Mapping
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Tuple
 
 from services.integration.shrink_detector import (
     detect_flags,
@@ -10,6 +11,10 @@ from services.integration.shrink_detector import (
     flag_overstock,
 )
 
+_NOW = datetime(2024, 5, 1, tzinfo=timezone.utc)
+_LIFE_NEAR = (_NOW + timedelta(days=3)).date().isoformat()
+_LIFE_FUTURE = (_NOW + timedelta(days=15)).date().isoformat()
+
 
 class DummyService:
     def __init__(
@@ -32,13 +37,14 @@ class DummyService:
         return dict(self._sales_by_window.get(window, {}))
 
 
-def build_inventory(now: datetime):
-    return [
+_INVENTORY: Tuple[Mapping[str, object], ...] = tuple(
+    MappingProxyType(record)
+    for record in (
         {
             "product": "Milk",
             "lot": "MILK-001",
             "quantity": 10.0,
-            "life_date": (now + timedelta(days=3)).date().isoformat(),
+            "life_date": _LIFE_NEAR,
             "locations": ["Cooler"],
             "default_code": "D-MILK",
         },
@@ -46,7 +52,7 @@ def build_inventory(now: datetime):
             "product": "Eggs",
             "lot": "EG-001",
             "quantity": 30.0,
-            "life_date": (now + timedelta(days=15)).date().isoformat(),
+            "life_date": _LIFE_FUTURE,
             "locations": ["Cooler"],
             "default_code": "D-EGGS",
         },
@@ -58,12 +64,13 @@ def build_inventory(now: datetime):
             "locations": ["Overflow"],
             "default_code": "D-EGGS",
         },
-    ]
+    )
+)
 
 
 def test_flag_near_expiry_returns_lots_within_threshold() -> None:
-    now = datetime(2024, 5, 1, tzinfo=timezone.utc)
-    service = DummyService(build_inventory(now), sales_by_window={})
+    now = _NOW
+    service = DummyService(_INVENTORY, sales_by_window={})
 
     flags = flag_near_expiry(service, days=5, now=now)
 
@@ -77,10 +84,9 @@ def test_flag_near_expiry_returns_lots_within_threshold() -> None:
 
 
 def test_flag_low_movement_uses_sales_window_and_threshold() -> None:
-    now = datetime(2024, 5, 1, tzinfo=timezone.utc)
-    inventory = build_inventory(now)
+    now = _NOW
     service = DummyService(
-        inventory,
+        _INVENTORY,
         sales_by_window={7: {"Milk": 0.5, "Eggs": 5.0}},
     )
 
@@ -96,10 +102,9 @@ def test_flag_low_movement_uses_sales_window_and_threshold() -> None:
 
 
 def test_flag_overstock_defaults_low_velocity_to_flag() -> None:
-    now = datetime(2024, 5, 1, tzinfo=timezone.utc)
-    inventory = build_inventory(now)
+    now = _NOW
     service = DummyService(
-        inventory,
+        _INVENTORY,
         sales_by_window={7: {"Milk": 2.0, "Eggs": 0.0}},
     )
 
@@ -115,10 +120,9 @@ def test_flag_overstock_defaults_low_velocity_to_flag() -> None:
 
 
 def test_detect_flags_combines_results_and_reuses_inventory_snapshot() -> None:
-    now = datetime(2024, 5, 1, tzinfo=timezone.utc)
-    inventory = build_inventory(now)
+    now = _NOW
     service = DummyService(
-        inventory,
+        _INVENTORY,
         sales_by_window={7: {"Milk": 0.5, "Eggs": 0.0}},
     )
 
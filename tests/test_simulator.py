@@ -1,17 +1,18 @@
 """Tests for the simulator service."""
 from __future__ import annotations
 
-from collections import Counter
-import json
+from copy import deepcopy
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from random import Random
 from tempfile import TemporaryDirectory
-from typing import Dict, Iterable, List, Optional
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
 from unittest import TestCase
 from unittest.mock import patch
 
-from packages.db import EventStore
+from packages.db import MEMORY_DB_PATH, EventStore
 from services.analysis.shrink_triggers import (
     LowMovementConfig,
     OverstockConfig,
@@ -19,11 +20,20 @@ from services.analysis.shrink_triggers import (
     ShrinkTriggerDetector,
 )
 from services.simulator.config import SimulatorConfig
-from services.simulator.events import EventWriter
+from services.simulator.events import EventHistory, EventWriter
 from services.simulator.scheduler import SimulatorScheduler
 from services.simulator.service import SimulatorService
 from services.simulator.state import StateTracker
 
+try:  # pragma: no cover - optional dependency
+    from orjson import loads as _loads  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    from json import loads as _loads
+
+_NOW = datetime(2024, 1, 10, 12, 0, tzinfo=timezone.utc)
+_LIFE_FUTURE = (_NOW.date() + timedelta(days=1)).isoformat()
+_LIFE_PAST = (_NOW.date() - timedelta(days=1)).isoformat()
+
 
 class FakeOdooClient:
     """Minimal in-memory stub for the Odoo client."""
@@ -39,6 +49,7 @@ class FakeOdooClient:
         self._lots = lots
         self.write_calls: List[Dict[str, object]] = []
         self.create_calls: List[Dict[str, object]] = []
+        self._cache: Dict[Tuple[object, ...], List[Mapping[str, object]]] = {}
 
     def authenticate(self) -> int:  # pragma: no cover - compatibility only
         return 1
@@ -49,22 +60,41 @@ class FakeOdooClient:
         domain: Iterable[Iterable[object]] | None = None,
         fields: Optional[Iterable[str]] = None,
         **_: object,
-    ) -> List[Dict[str, object]]:
+    ) -> List[Mapping[str, object]]:
+        field_names = tuple(fields or ()) or None
+        key = (model, _domain_key(domain), field_names)
+        cached = self._cache.get(key)
+        if cached is None:
+            cached = self._cache[key] = self._search_read(model, domain, field_names)
+        return list(cached)
+
+    def _search_read(
+        self,
+        model: str,
+        domain: Iterable[Iterable[object]] | None,
+        fields: Optional[Iterable[str]],
+    ) -> List[Mapping[str, object]]:
+        fields = tuple(field for field in fields if field != "id") if fields else None
+        compiled = _compile_domain(domain)
         if model == "stock.quant":
             return [self._select_fields(record, fields) for record in self._quants.values()]
         if model == "product.product":
-            ids = _extract_ids_from_domain(domain)
-            records = [self._products[i] for i in ids if i in self._products]
+            records = [self._products[i] for i in compiled.ids if i in self._products]
+            records = [r for r in records if compiled.matches(r)]
             return [self._select_fields(record, fields) for record in records]
         if model == "stock.lot":
-            records = list(self._lots.values())
-            records = [r for r in records if _matches_domain(r, domain)]
+            if compiled.ids:
+                records = [self._lots[i] for i in compiled.ids if i in self._lots]
+            else:
+                records = self._lots.values()
+            records = [r for r in records if compiled.matches(r)]
             return [self._select_fields(record, fields) for record in records]
         raise AssertionError(f"Unexpected model {model}")
 
     def write(self, model: str, record_id: int, values: Dict[str, object]) -> bool:
-        payload = {"model": model, "id": record_id, "values": dict(values)}
+        payload = {"model": model, "id": record_id, "values": values}
         self.write_calls.append(payload)
+        self._cache.clear()
         if model == "stock.quant":
             if "lot_id" in values:
                 lot_id = int(values["lot_id"])
@@ -79,8 +109,9 @@ class FakeOdooClient:
         raise AssertionError(f"Unexpected model {model}")
 
     def create(self, model: str, values: Dict[str, object]) -> int:
-        payload = {"model": model, "values": dict(values)}
+        payload = {"model": model, "values": values}
         self.create_calls.append(payload)
+        self._cache.clear()
         if model == "stock.lot":
             new_id = max(self._lots, default=200) + 1
             record = dict(values)
@@ -90,83 +121,132 @@ class FakeOdooClient:
         raise AssertionError(f"Unexpected create model {model}")
 
     def _select_fields(
-        self, record: Dict[str, object], fields: Optional[Iterable[str]]
-    ) -> Dict[str, object]:
-        if not fields:
-            return dict(record)
-        output = {"id": record["id"]}
-        for field in fields:
-            if field == "id":
-                continue
-            output[field] = record.get(field)
-        return output
+        self, record: Dict[str, object], fields: Optional[Tuple[str, ...]]
+    ) -> Mapping[str, object]:
+        if fields is None:
+            return MappingProxyType(record)
+        return {"id": record["id"], **{field: record.get(field) for field in fields}}
+
+
+def _domain_key(domain: Iterable[Iterable[object]] | None) -> Tuple[object, ...]:
+    if not domain:
+        return ()
+    return tuple(
+        tuple(tuple(part) if isinstance(part, list) else part for part in term) for term in domain
+    )
+
+
+@dataclass
+class CompiledDomain:
+    """Domain terms parsed once per ``search_read`` call."""
+
+    ids: List[int] = field(default_factory=list)
+    in_filters: Dict[str, Tuple[object, ...]] = field(default_factory=dict)
+    eq_filters: Dict[str, object] = field(default_factory=dict)
+
+    def matches(self, record: Mapping[str, object]) -> bool:
+        return all(record.get(name) in values for name, values in self.in_filters.items()) and all(
+            record.get(name) == value for name, value in self.eq_filters.items()
+        )
+
+
+def _compile_domain(domain: Iterable[Iterable[object]] | None) -> CompiledDomain:
+    compiled = CompiledDomain(ids=_extract_ids_from_domain(domain))
+    for term in domain or ():
+        if len(term) < 3:
+            continue
+        name, op, value = term[0], term[1], term[2]
+        if op == "in":
+            compiled.in_filters[name] = tuple(value)
+        elif op == "=":
+            compiled.eq_filters[name] = value
+    return compiled
 
 
 def _extract_ids_from_domain(domain: Iterable[Iterable[object]] | None) -> List[int]:
     if not domain:
-        return list(range(0))
+        return []
     ids: List[int] = []
     for term in domain:
-        if len(term) >= 3 and term[1] == "in":
+        if len(term) >= 3 and term[0] == "id" and term[1] == "in":
             value = term[2]
             if isinstance(value, list):
                 ids.extend(int(v) for v in value)
     return ids
 
 
-def _matches_domain(record: Dict[str, object], domain: Iterable[Iterable[object]] | None) -> bool:
-    if not domain:
-        return True
-    for term in domain:
-        if len(term) < 3:
-            continue
-        field, op, value = term[0], term[1], term[2]
-        if op == "in":
-            if record.get(field) not in value:
-                return False
-        elif op == "=":
-            if record.get(field) != value:
-                return False
-    return True
+class InMemoryEventHistory(EventHistory):
+    """Event history reading from the lines captured by a spy writer."""
+
+    def __init__(self, path: Path, lines: List[str]) -> None:
+        super().__init__(path)
+        self.lines = lines
+
+    def _lines(self) -> Iterator[str]:
+        return iter(self.lines)
+
+
+class SpyEventWriter(EventWriter):
+    """Event writer that records each JSON line in ``written`` instead of a file."""
+
+    def __init__(self, path: Path, store: EventStore | None = None) -> None:
+        super().__init__(path, store=store)
+        self.written: List[str] = []
+
+    def history(self) -> EventHistory:
+        return InMemoryEventHistory(self.path, self.written)
+
+    def _append_lines(self, lines: Sequence[str]) -> None:
+        self.written.extend(lines)
+
+
+class InMemoryStateTracker(StateTracker):
+    """State tracker that never touches the filesystem."""
+
+    def _save(self) -> None:
+        pass
 
 
 class SimulatorServiceTests(TestCase):
-    def setUp(self) -> None:
-        self.tmpdir = TemporaryDirectory()
-        self.now = datetime(2024, 1, 10, 12, 0, tzinfo=timezone.utc)
-        self.client = FakeOdooClient(
-            quants={
-                1: {
-                    "id": 1,
-                    "product_id": [101, "Gala Apples"],
-                    "quantity": 100.0,
-                    "lot_id": [201, "LOT-201"],
-                },
-                2: {
-                    "id": 2,
-                    "product_id": [102, "Whole Milk"],
-                    "quantity": 50.0,
-                    "lot_id": [202, "LOT-202"],
-                },
+    now = _NOW
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        # The doubles never write to these paths; the base constructors only need a real parent.
+        cls._tmpdir = TemporaryDirectory()
+        cls._base_path = Path(cls._tmpdir.name)
+        cls._rng = Random()
+        cls._base_quants = {
+            1: {
+                "id": 1,
+                "product_id": [101, "Gala Apples"],
+                "quantity": 100.0,
+                "lot_id": [201, "LOT-201"],
             },
-            products={
-                101: {"id": 101, "name": "Gala Apples", "categ_id": [301, "Produce"]},
-                102: {"id": 102, "name": "Whole Milk", "categ_id": [302, "Dairy"]},
+            2: {
+                "id": 2,
+                "product_id": [102, "Whole Milk"],
+                "quantity": 50.0,
+                "lot_id": [202, "LOT-202"],
             },
-            lots={
-                201: {
-                    "id": 201,
-                    "name": "LOT-201",
-                    "life_date": (self.now.date() + timedelta(days=1)).isoformat(),
-                },
-                202: {
-                    "id": 202,
-                    "name": "LOT-202",
-                    "life_date": (self.now.date() - timedelta(days=1)).isoformat(),
-                },
+        }
+        cls._base_products = {
+            101: {"id": 101, "name": "Gala Apples", "categ_id": [301, "Produce"]},
+            102: {"id": 102, "name": "Whole Milk", "categ_id": [302, "Dairy"]},
+        }
+        cls._base_lots = {
+            201: {
+                "id": 201,
+                "name": "LOT-201",
+                "life_date": _LIFE_FUTURE,
             },
-        )
-        self.config = SimulatorConfig.from_mapping(
+            202: {
+                "id": 202,
+                "name": "LOT-202",
+                "life_date": _LIFE_PAST,
+            },
+        }
+        cls._config = SimulatorConfig.from_mapping(
             {
                 "sell_down": {"default": 0.1, "category_rates": {"Produce": 0.2}},
                 "returns": {"default": 1.0},
@@ -175,12 +255,16 @@ class SimulatorServiceTests(TestCase):
                 "daily_expiry": {"default": 5, "perishability": {"Dairy": 2}},
             }
         )
-        base_path = Path(self.tmpdir.name)
-        self.events_path = base_path / "events.jsonl"
-        self.state_path = base_path / "state.json"
-        self.db_path = base_path / "events.db"
-        self.writer = EventWriter(self.events_path, store=EventStore(self.db_path))
-        self.state = StateTracker(self.state_path, timedelta(hours=24))
+
+    def setUp(self) -> None:
+        self.client = FakeOdooClient(
+            quants=deepcopy(self._base_quants),
+            products=deepcopy(self._base_products),
+            lots=deepcopy(self._base_lots),
+        )
+        self.config = self._config
+        self.writer = SpyEventWriter(self._base_path / "events.jsonl", store=EventStore(MEMORY_DB_PATH))
+        self.state = InMemoryStateTracker(self._base_path / "state.json", timedelta(hours=24))
         shrink_config = ShrinkTriggerConfig(
             low_movement=LowMovementConfig(units_threshold=40.0, window_days=7),
             overstock=OverstockConfig(
@@ -193,16 +277,21 @@ class SimulatorServiceTests(TestCase):
         self.shrink_detector = ShrinkTriggerDetector(self.writer.store, shrink_config)
 
     def tearDown(self) -> None:
-        self.tmpdir.cleanup()
+        self.writer.store.close()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._tmpdir.cleanup()
 
     def _service(self) -> SimulatorService:
+        self._rng.seed(0)
         return SimulatorService(
             self.client,
             self.config,
             self.writer,
             self.state,
             now_fn=lambda: self.now,
-            rng=Random(0),
+            rng=self._rng,
             shrink_detector=self.shrink_detector,
         )
 
@@ -221,11 +310,11 @@ class SimulatorServiceTests(TestCase):
         self.assertNotEqual(self.client._lots[dairy_lot]["name"], "LOT-202")
         self.assertTrue(any(call["model"] == "stock.lot" for call in self.client.create_calls))
 
-        counts = Counter(event.type for event in events)
-        self.assertGreaterEqual(counts["returns"], 1)
-        self.assertGreaterEqual(counts["shrink"], 1)
-        self.assertEqual(counts["flag_low_movement"], 2)
-        self.assertEqual(counts["flag_overstock"], 2)
+        types = [event.type for event in events]
+        self.assertGreaterEqual(types.count("returns"), 1)
+        self.assertGreaterEqual(types.count("shrink"), 1)
+        self.assertEqual(types.count("flag_low_movement"), 2)
+        self.assertEqual(types.count("flag_overstock"), 2)
 
     def test_returns_never_exceed_total_sold(self) -> None:
         service = self._service()
@@ -244,9 +333,8 @@ class SimulatorServiceTests(TestCase):
         for product, summary in totals.items():
             self.assertLessEqual(summary["returned"], summary["sold"] + 1e-6, product)
 
-        # File log should also reflect returns events for later runs.
-        with self.events_path.open("r", encoding="utf-8") as handle:
-            history = [json.loads(line) for line in handle if line.strip()]
+        # The JSON lines log should also reflect returns events for later runs.
+        history = _loads("[" + ",".join(line for line in self.writer.written if line.strip()) + "]")
         self.assertTrue(any(entry["type"] == "returns" for entry in history))
 
     def test_shrink_never_makes_negative_quantities(self) -> None:
@@ -256,10 +344,8 @@ class SimulatorServiceTests(TestCase):
         for quant in self.client._quants.values():
             self.assertGreaterEqual(quant["quantity"], 0.0)
 
-        with self.events_path.open("r", encoding="utf-8") as handle:
-            lines = handle.readlines()
-        self.assertEqual(len(lines), 13)
-        self.assertTrue(all("\"source\":\"simulator\"" in line for line in lines))
+        self.assertEqual(len(self.writer.written), 13)
+        self.assertTrue(all("\"source\":\"simulator\"" in line for line in self.writer.written))
 
     def test_daily_job_respects_interval(self) -> None:
         service = self._service()
@@ -269,9 +355,9 @@ class SimulatorServiceTests(TestCase):
         events = service.run_once(force=False)
         # Daily expiry should be skipped, leaving only sell down + receiving job events (plus analysis flags).
         self.assertEqual(len(events), 8)
-        counts = Counter(event.type for event in events)
-        self.assertEqual(counts["flag_low_movement"], 2)
-        self.assertEqual(counts["flag_overstock"], 2)
+        types = [event.type for event in events]
+        self.assertEqual(types.count("flag_low_movement"), 2)
+        self.assertEqual(types.count("flag_overstock"), 2)
         self.assertEqual(
             [call["model"] for call in self.client.write_calls[len(writes_after_first) :]],
             ["stock.quant", "stock.quant", "stock.quant", "stock.quant"],
@@ -284,12 +370,10 @@ class SimulatorServiceTests(TestCase):
             scheduler.run(max_ticks=2)
 
         # First tick runs all jobs; second tick should skip daily expiry only.
-        with self.events_path.open("r", encoding="utf-8") as handle:
-            lines = handle.readlines()
-        self.assertEqual(len(lines), 21)
+        self.assertEqual(len(self.writer.written), 21)
 
         events = service.run_once(force=False)
         self.assertEqual(len(events), 8)
-        counts = Counter(event.type for event in events)
-        self.assertEqual(counts["flag_low_movement"], 2)
-        self.assertEqual(counts["flag_overstock"], 2)
+        types = [event.type for event in events]
+        self.assertEqual(types.count("flag_low_movement"), 2)
+        self.assertEqual(types.count("flag_overstock"), 2)
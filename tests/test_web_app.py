@@ -3,23 +3,79 @@ from __future__ import annotations
 import csv
 import io
 import json
+import math
+import sqlite3
 from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
+from typing import Iterator, Mapping, Tuple
 
+import pytest
 from fastapi.testclient import TestClient
 
 from apps.web import create_app
-from apps.web.data import calculate_at_risk, load_recent_events, snapshot_from_quants
-from packages.db import EventStore, InventoryEvent
+from apps.web.app import _now, _parse_since, _render_csv
+from apps.web.data import (
+    _FLAGGED_CACHE,
+    _FLAGGED_CACHE_SIZE,
+    calculate_at_risk,
+    load_flagged_decisions,
+    load_recent_events,
+    snapshot_from_quants,
+)
+from packages.db import MEMORY_DB_PATH, EventStore, InventoryEvent
 from services.compliance import (
     CSV_HEADERS as COMPLIANCE_CSV_HEADERS,
     to_compliance_event,
     validate_and_persist,
 )
-from scripts.db_migrate import run as run_migration
+from scripts.db_migrate import apply_event_schema
 from services.recall import QuarantinedItem, RecallResult
 from services.simulator.inventory import QuantRecord
 
+try:  # pragma: no cover - optional dependency
+    from orjson import dumps as _dumps  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    def _dumps(value: object) -> bytes:
+        return json.dumps(value).encode("utf-8")
+
+_NOW = datetime(2024, 1, 15, 12, 0, tzinfo=timezone.utc)
+
+_APPLE = QuantRecord(
+    id=1,
+    product_id=101,
+    product_name="Gala Apples",
+    default_code="FF-101",
+    category="Produce",
+    quantity=12.5,
+    lot_id=201,
+    lot_name="LOT-1",
+    life_date=date(2024, 1, 12),
+)
+_MILK = QuantRecord(
+    id=2,
+    product_id=102,
+    product_name="Whole Milk",
+    default_code="FF-102",
+    category="Dairy",
+    quantity=0.0,
+    lot_id=202,
+    lot_name="LOT-2",
+    life_date=date(2024, 1, 11),
+)
+_CHEDDAR = QuantRecord(
+    id=3,
+    product_id=103,
+    product_name="Cheddar",
+    default_code="FF-103",
+    category="Dairy",
+    quantity=4.0,
+    lot_id=203,
+    lot_name="LOT-3",
+    life_date=date(2024, 1, 20),
+)
+# Shared read-only snapshot; tests must not mutate it.
+_SAMPLE_SNAPSHOT = snapshot_from_quants([_APPLE, _MILK, _CHEDDAR])
+
 
 def _media_type(response):
     media_type = getattr(response, "media_type", None)
@@ -28,6 +84,101 @@ def _media_type(response):
     return media_type
 
 
+def _memory_event_store() -> Tuple[sqlite3.Connection, EventStore]:
+    # The schema and rows live on one in-memory connection shared with the app under test.
+    conn = sqlite3.connect(MEMORY_DB_PATH, check_same_thread=False)
+    apply_event_schema(conn)
+    return conn, EventStore(conn)
+
+
+@pytest.fixture
+def event_store() -> Iterator[EventStore]:
+    conn, store = _memory_event_store()
+    yield store
+    conn.close()
+
+
+@pytest.fixture(scope="module")
+def populated_store() -> Iterator[EventStore]:
+    # Read-only events shared by the /events and /metrics/summary tests.
+    conn, store = _memory_event_store()
+    store.add_events(
+        [
+            InventoryEvent(
+                ts=_NOW - timedelta(days=1),
+                type="receiving",
+                product="Gala Apples",
+                lot="LOT-1",
+                qty=5.0,
+                before=10.0,
+                after=15.0,
+            ),
+            InventoryEvent(
+                ts=_NOW - timedelta(days=5),
+                type="receiving",
+                product="Gala Apples",
+                lot="LOT-2",
+                qty=5.0,
+                before=15.0,
+                after=20.0,
+            ),
+            InventoryEvent(
+                ts=_NOW - timedelta(days=2),
+                type="sell_down",
+                product="Whole Milk",
+                lot="LOT-3",
+                qty=-2.0,
+                before=8.0,
+                after=6.0,
+            ),
+        ]
+    )
+    yield store
+    conn.close()
+
+
+@pytest.fixture(scope="module")
+def stub_client() -> TestClient:
+    # Shared by tests whose requests never reach provider data, so one app suffices.
+    app = create_app(
+        repository_factory=lambda: None,
+        odoo_client_provider=lambda: None,
+        recall_service_factory=lambda: None,
+    )
+    return TestClient(app)
+
+
+def _write_jsonl(path: Path, entries) -> None:
+    path.write_bytes(b"".join(_dumps(entry) + b"\n" for entry in entries))
+
+
+class FakeRepository:
+    def __init__(self, snapshot) -> None:
+        self.snapshot = snapshot
+        self.expiry_field = None
+
+    def set_lot_expiry_field(self, field):
+        self.expiry_field = field
+
+    def load_snapshot(self):
+        return self.snapshot
+
+
+class FakeOdooClient:
+    """Answers the lot expiry-field probes with ``expiry_fields`` (field name -> id)."""
+
+    def __init__(self, expiry_fields: Mapping[str, int]) -> None:
+        self.expiry_fields = dict(expiry_fields)
+
+    def search_read(self, model, domain, fields=None, limit=None, order=None):
+        if model == "ir.model" and domain == [["model", "=", "stock.lot"]]:
+            return [{"id": 1}]
+        if model == "ir.model.fields":
+            names = [clause[2] for clause in domain if list(clause[:2]) == ["name", "="]]
+            return [{"id": self.expiry_fields[name]} for name in names if name in self.expiry_fields]
+        raise AssertionError(f"Unexpected call: {model}, {domain}")
+
+
 def test_load_recent_events_orders_and_limits(tmp_path: Path) -> None:
     events_path = tmp_path / "events.jsonl"
     entries = [
@@ -59,24 +210,60 @@ def test_load_recent_events_orders_and_limits(tmp_path: Path) -> None:
             "after": 0.0,
         },
     ]
-    with events_path.open("w", encoding="utf-8") as handle:
-        for entry in entries:
-            handle.write(json.dumps(entry))
-            handle.write("\n")
+    _write_jsonl(events_path, entries)
 
     records = load_recent_events(events_path, limit=2)
     assert [record.product for record in records] == ["Whole Milk", "Gala Apples"]
 
 
-def test_root_endpoint_lists_links() -> None:
-    app = create_app(
-        repository_factory=lambda: None,
-        odoo_client_provider=lambda: None,
-        recall_service_factory=lambda: None,
+def test_load_recent_events_accepts_non_finite_quantities(tmp_path: Path) -> None:
+    events_path = tmp_path / "events.jsonl"
+    # The simulator writes with json.dumps, which emits bare NaN/Infinity tokens.
+    entry = {
+        "ts": "2024-01-10T12:00:00+00:00",
+        "type": "shrink",
+        "product": "Gala Apples",
+        "lot": None,
+        "qty": float("nan"),
+        "before": 10.0,
+        "after": float("inf"),
+    }
+    events_path.write_text(json.dumps(entry) + "\n", encoding="utf-8")
+
+    records = load_recent_events(events_path, limit=1)
+    assert [record.product for record in records] == ["Gala Apples"]
+    assert math.isnan(records[0].qty)
+
+
+def test_load_flagged_decisions_reparses_only_after_file_changes(tmp_path: Path) -> None:
+    flagged_path = tmp_path / "flagged.json"
+    original = [{"default_code": "FF101", "reason": "near_expiry", "stores": ["Downtown"]}]
+    flagged_path.write_text(json.dumps(original), encoding="utf-8")
+
+    first = load_flagged_decisions(flagged_path)
+    first[0]["reason"] = "mutated"
+    first[0]["stores"].append("Uptown")
+    assert load_flagged_decisions(flagged_path) == original
+
+    flagged_path.write_text(
+        json.dumps([{"default_code": "FF101"}, {"default_code": "FF102"}]),
+        encoding="utf-8",
     )
-    client = TestClient(app)
+    assert [record["default_code"] for record in load_flagged_decisions(flagged_path)] == ["FF101", "FF102"]
+
+
+def test_load_flagged_decisions_cache_is_bounded(tmp_path: Path) -> None:
+    for index in range(_FLAGGED_CACHE_SIZE + 3):
+        flagged_path = tmp_path / f"flagged-{index}.json"
+        flagged_path.write_text(json.dumps([{"default_code": f"FF{index}"}]), encoding="utf-8")
+        load_flagged_decisions(flagged_path)
+
+    assert len(_FLAGGED_CACHE) <= _FLAGGED_CACHE_SIZE
+    assert flagged_path in _FLAGGED_CACHE
+
 
-    response = client.get("/")
+def test_root_endpoint_lists_links(stub_client: TestClient) -> None:
+    response = stub_client.get("/")
     assert response.status_code == 200
     payload = response.json()
     assert payload["app"] == "FoodFlow reporting API"
@@ -154,58 +341,13 @@ def test_recall_quarantined_lists_items() -> None:
     assert payload["items"][0]["default_code"] == "FF102"
 
 
-def test_recall_trigger_returns_service_unavailable() -> None:
-    app = create_app(
-        repository_factory=lambda: None,
-        odoo_client_provider=lambda: None,
-        recall_service_factory=lambda: None,
-    )
-    client = TestClient(app)
-
-    response = client.post("/recall/trigger", json={"codes": ["FF101"]})
+def test_recall_trigger_returns_service_unavailable(stub_client: TestClient) -> None:
+    response = stub_client.post("/recall/trigger", json={"codes": ["FF101"]})
     assert response.status_code == 503
 
 
 def test_calculate_at_risk_filters_by_threshold() -> None:
-    snapshot = snapshot_from_quants(
-        [
-            QuantRecord(
-                id=1,
-                product_id=101,
-                product_name="Gala Apples",
-                default_code="FF-101",
-                category="Produce",
-                quantity=12.5,
-                lot_id=201,
-                lot_name="LOT-1",
-                life_date=date(2024, 1, 12),
-            ),
-            QuantRecord(
-                id=2,
-                product_id=102,
-                product_name="Whole Milk",
-                default_code="FF-102",
-                category="Dairy",
-                quantity=0.0,
-                lot_id=202,
-                lot_name="LOT-2",
-                life_date=date(2024, 1, 11),
-            ),
-            QuantRecord(
-                id=3,
-                product_id=103,
-                product_name="Cheddar",
-                default_code="FF-103",
-                category="Dairy",
-                quantity=4.0,
-                lot_id=203,
-                lot_name="LOT-3",
-                life_date=date(2024, 1, 20),
-            ),
-        ]
-    )
-
-    results = calculate_at_risk(snapshot, today=date(2024, 1, 10), threshold_days=3)
+    results = calculate_at_risk(_SAMPLE_SNAPSHOT, today=date(2024, 1, 10), threshold_days=3)
     assert len(results) == 1
     assert results[0].product == "Gala Apples"
     assert results[0].default_code == "FF-101"
@@ -225,49 +367,12 @@ def test_app_endpoints_return_json(tmp_path: Path) -> None:
             "after": 6.0,
         }
     ]
-    with events_path.open("w", encoding="utf-8") as handle:
-        for entry in entries:
-            handle.write(json.dumps(entry))
-            handle.write("\n")
-
-    snapshot = snapshot_from_quants(
-        [
-            QuantRecord(
-                id=1,
-                product_id=101,
-                product_name="Gala Apples",
-                default_code="FF-101",
-                category="Produce",
-                quantity=5.0,
-                lot_id=201,
-                lot_name="LOT-1",
-                life_date=date(2024, 1, 12),
-            )
-        ]
-    )
-
-    class FakeRepository:
-        def __init__(self) -> None:
-            self.expiry_field = None
-
-        def set_lot_expiry_field(self, field):
-            self.expiry_field = field
-
-        def load_snapshot(self):
-            return snapshot
-
-    class FakeOdooClient:
-        def search_read(self, model, domain, fields=None, limit=None, order=None):
-            if model == "ir.model" and domain == [["model", "=", "stock.lot"]]:
-                return [{"id": 1}]
-            if model == "ir.model.fields" and ["name", "=", "life_date"] in domain:
-                return [{"id": 1}]
-            raise AssertionError(f"Unexpected call: {model}, {domain}")
+    _write_jsonl(events_path, entries)
 
     app = create_app(
         events_path_provider=lambda: events_path,
-        repository_factory=lambda: FakeRepository(),
-        odoo_client_provider=lambda: FakeOdooClient(),
+        repository_factory=lambda: FakeRepository(snapshot_from_quants([_APPLE])),
+        odoo_client_provider=lambda: FakeOdooClient({"life_date": 1}),
     )
     client = TestClient(app)
 
@@ -310,17 +415,9 @@ def test_recent_events_handles_missing_file(tmp_path: Path) -> None:
 
 
 def test_at_risk_reports_missing_field() -> None:
-    class MissingLifeDateClient:
-        def search_read(self, model, domain, fields=None, limit=None, order=None):
-            if model == "ir.model" and domain == [["model", "=", "stock.lot"]]:
-                return [{"id": 1}]
-            if model == "ir.model.fields":
-                return []
-            raise AssertionError(f"Unexpected call: {model}, {domain}")
-
     app = create_app(
         repository_factory=lambda: None,
-        odoo_client_provider=lambda: MissingLifeDateClient(),
+        odoo_client_provider=lambda: FakeOdooClient({}),
     )
     client = TestClient(app)
 
@@ -334,48 +431,21 @@ def test_at_risk_reports_missing_field() -> None:
 
 
 def test_at_risk_falls_back_to_expiration_date() -> None:
-    class ExpirationDateClient:
-        def __init__(self) -> None:
-            self.calls = []
-
-        def search_read(self, model, domain, fields=None, limit=None, order=None):
-            if model == "ir.model":
-                return [{"id": 1}]
-            if model == "ir.model.fields":
-                # Simulate only expiration_date existing
-                if ["name", "=", "life_date"] in domain:
-                    return []
-                if ["name", "=", "expiration_date"] in domain:
-                    return [{"id": 2}]
-            raise AssertionError(f"Unexpected call: {model}, {domain}")
-
-    class FakeRepository:
-        def __init__(self) -> None:
-            self.expiry_field = None
-
-        def set_lot_expiry_field(self, field):
-            self.expiry_field = field
-
-        def load_snapshot(self):
-            return snapshot_from_quants(
-                [
-                    QuantRecord(
-                        id=1,
-                        product_id=101,
-                        product_name="Bananas",
-                        default_code="BAN-1",
-                        category="Produce",
-                        quantity=10.0,
-                        lot_id=5,
-                        lot_name="LOT-BAN",
-                        life_date=date(2024, 1, 15),
-                    )
-                ]
-            )
+    bananas = QuantRecord(
+        id=1,
+        product_id=101,
+        product_name="Bananas",
+        default_code="BAN-1",
+        category="Produce",
+        quantity=10.0,
+        lot_id=5,
+        lot_name="LOT-BAN",
+        life_date=date(2024, 1, 15),
+    )
 
     app = create_app(
-        repository_factory=lambda: FakeRepository(),
-        odoo_client_provider=lambda: ExpirationDateClient(),
+        repository_factory=lambda: FakeRepository(snapshot_from_quants([bananas])),
+        odoo_client_provider=lambda: FakeOdooClient({"expiration_date": 2}),
     )
     client = TestClient(app)
 
@@ -450,6 +520,7 @@ def test_markdown_labels_generate_pdfs(tmp_path: Path) -> None:
 
 def test_markdown_labels_combined_cached(tmp_path: Path) -> None:
     output_dir = tmp_path / "labels"
+    apple_name = ["Gala Apples"]
 
     class FakeClient:
         def search_read(self, model, domain, fields=None, limit=None, order=None):
@@ -457,7 +528,7 @@ def test_markdown_labels_combined_cached(tmp_path: Path) -> None:
             return [
                 {
                     "id": 10,
-                    "name": "Gala Apples",
+                    "name": apple_name[0],
                     "default_code": "FF101",
                     "barcode": "1234567890123",
                     "categ_id": [1, "Produce"],
@@ -499,28 +570,21 @@ def test_markdown_labels_combined_cached(tmp_path: Path) -> None:
     filenames = {item["filename"] for item in payload["labels"]}
     assert combined_path.name in filenames
 
+    apple_name[0] = "Honeycrisp Apples"
+    third = client.post("/labels/markdown?combined=true", json={"default_codes": ["FF101", "FF102"]})
+    assert third.status_code == 200
+    assert len(list(output_dir.glob("labels-combined-*.pdf"))) == 2
 
-def test_markdown_labels_validates_payload() -> None:
-    app = create_app(
-        repository_factory=lambda: None,
-        odoo_client_provider=lambda: None,
-    )
-    client = TestClient(app)
 
-    resp = client.post("/labels/markdown", json={"default_codes": []})
+def test_markdown_labels_validates_payload(stub_client: TestClient) -> None:
+    resp = stub_client.post("/labels/markdown", json={"default_codes": []})
     assert resp.status_code == 400
     error = resp.json()
     assert error["detail"]["default_codes"]
 
 
-def test_markdown_labels_requires_body() -> None:
-    app = create_app(
-        repository_factory=lambda: None,
-        odoo_client_provider=lambda: None,
-    )
-    client = TestClient(app)
-
-    resp = client.post("/labels/markdown")
+def test_markdown_labels_requires_body(stub_client: TestClient) -> None:
+    resp = stub_client.post("/labels/markdown")
     assert resp.status_code == 400
     error = resp.json()
     assert error["detail"]["default_codes"]
@@ -574,6 +638,28 @@ def test_flagged_endpoint_applies_filters(tmp_path: Path) -> None:
     assert payload["items"][0]["estimated_weight_lbs"] == 9.0
     assert payload["items"][0]["unit"] == "EA"
 
+    combined = client.get("/flagged", params={"category": "Dairy", "reason": "low_movement"}).json()
+    assert [item["default_code"] for item in combined["items"]] == ["FF202"]
+    disjoint = client.get("/flagged", params={"store": "Downtown", "reason": "low_movement"}).json()
+    assert disjoint["items"] == []
+    assert disjoint["meta"]["count"] == 0
+
+
+@pytest.mark.parametrize(
+    ("headers", "rows"),
+    [
+        (("code",), [{"code": ""}, {"code": "FF101"}]),
+        (("code", "note"), [{"code": "FF101", "note": 'say "hi", then\r\nleave'}, {"code": "", "note": ""}]),
+    ],
+)
+def test_render_csv_matches_dict_writer(headers: Tuple[str, ...], rows: list[dict[str, str]]) -> None:
+    expected = io.StringIO()
+    writer = csv.DictWriter(expected, fieldnames=headers)
+    writer.writeheader()
+    writer.writerows(rows)
+
+    assert _render_csv(rows, headers) == expected.getvalue()
+
 
 def test_export_flagged_csv_includes_headers(tmp_path: Path) -> None:
     flagged_path = tmp_path / "flagged.json"
@@ -754,49 +840,28 @@ def test_labels_index_handles_missing_directory(tmp_path: Path) -> None:
 
 
 
-def test_events_endpoint_filters_by_type_and_since(tmp_path: Path) -> None:
-    db_path = tmp_path / "events.db"
-    run_migration(db_path)
-    store = EventStore(db_path)
-    now = datetime.now(timezone.utc)
-    store.add_events(
-        [
-            InventoryEvent(
-                ts=now - timedelta(days=1),
-                type="receiving",
-                product="Gala Apples",
-                lot="LOT-1",
-                qty=5.0,
-                before=10.0,
-                after=15.0,
-            ),
-            InventoryEvent(
-                ts=now - timedelta(days=5),
-                type="receiving",
-                product="Gala Apples",
-                lot="LOT-2",
-                qty=5.0,
-                before=15.0,
-                after=20.0,
-            ),
-            InventoryEvent(
-                ts=now - timedelta(days=2),
-                type="sell_down",
-                product="Whole Milk",
-                lot="LOT-3",
-                qty=-2.0,
-                before=8.0,
-                after=6.0,
-            ),
-        ]
-    )
+@pytest.mark.parametrize(
+    ("value", "delta"),
+    [
+        ("45s", timedelta(seconds=45)),
+        ("90m", timedelta(minutes=90)),
+        ("24H", timedelta(hours=24)),
+        ("3d", timedelta(days=3)),
+    ],
+)
+def test_parse_since_accepts_duration_shorthand(value: str, delta: timedelta) -> None:
+    reference = datetime(2024, 1, 10, 12, 0, tzinfo=timezone.utc)
+    assert _parse_since(value, reference=reference) == reference - delta
+
 
+def test_events_endpoint_filters_by_type_and_since(populated_store: EventStore, tmp_path: Path) -> None:
     app = create_app(
         events_path_provider=lambda: tmp_path / "unused.jsonl",
         repository_factory=lambda: None,
         odoo_client_provider=lambda: None,
-        event_store_provider=lambda: EventStore(db_path),
+        event_store_provider=lambda: populated_store,
     )
+    app.dependency_overrides[_now] = lambda: _NOW
     client = TestClient(app)
 
     resp = client.get("/events", params={"type": "receiving", "since": "3d", "limit": 5})
@@ -808,12 +873,9 @@ def test_events_endpoint_filters_by_type_and_since(tmp_path: Path) -> None:
     assert payload["events"][0]["lot"] == "LOT-1"
 
 
-def test_export_events_csv_filters_results(tmp_path: Path) -> None:
-    db_path = tmp_path / "events.db"
-    run_migration(db_path)
-    store = EventStore(db_path)
+def test_export_events_csv_filters_results(event_store: EventStore, tmp_path: Path) -> None:
     timestamp = datetime(2024, 1, 12, 15, 30, tzinfo=timezone.utc)
-    store.add_events(
+    event_store.add_events(
         [
             InventoryEvent(
                 ts=timestamp,
@@ -840,7 +902,7 @@ def test_export_events_csv_filters_results(tmp_path: Path) -> None:
         events_path_provider=lambda: tmp_path / "unused.jsonl",
         repository_factory=lambda: None,
         odoo_client_provider=lambda: None,
-        event_store_provider=lambda: EventStore(db_path),
+        event_store_provider=lambda: event_store,
     )
     client = TestClient(app)
 
@@ -944,63 +1006,33 @@ def test_compliance_export_csv_handles_missing_file(tmp_path: Path, monkeypatch)
     assert text.splitlines()[0] == ",".join(COMPLIANCE_CSV_HEADERS)
 
 
-def test_metrics_summary_reports_counts(tmp_path: Path) -> None:
-    db_path = tmp_path / "events.db"
-    run_migration(db_path)
-    store = EventStore(db_path)
-    now = datetime.now(timezone.utc)
-    store.add_events(
-        [
-            InventoryEvent(
-                ts=now - timedelta(hours=1),
-                type="receiving",
-                product="Gala Apples",
-                lot=None,
-                qty=5.0,
-                before=10.0,
-                after=15.0,
-            ),
-            InventoryEvent(
-                ts=now - timedelta(hours=2),
-                type="sell_down",
-                product="Whole Milk",
-                lot="LOT-3",
-                qty=-2.0,
-                before=8.0,
-                after=6.0,
-            ),
-        ]
-    )
-
+def test_metrics_summary_reports_counts(populated_store: EventStore, tmp_path: Path) -> None:
     app = create_app(
         events_path_provider=lambda: tmp_path / "unused.jsonl",
         repository_factory=lambda: None,
         odoo_client_provider=lambda: None,
-        event_store_provider=lambda: EventStore(db_path),
+        event_store_provider=lambda: populated_store,
     )
     client = TestClient(app)
 
     resp = client.get("/metrics/summary")
     assert resp.status_code == 200
     payload = resp.json()
-    assert payload["events"]["total"] == 2
-    assert payload["events"]["by_type"]["receiving"] == 1
+    assert payload["events"]["total"] == 3
+    assert payload["events"]["by_type"]["receiving"] == 2
     assert payload["events"]["by_type"]["sell_down"] == 1
     assert payload["meta"]["source"] == "database"
 
 
-def test_metrics_last_sync_reports_timestamp(tmp_path: Path) -> None:
-    db_path = tmp_path / "events.db"
-    run_migration(db_path)
-    store = EventStore(db_path)
+def test_metrics_last_sync_reports_timestamp(event_store: EventStore, tmp_path: Path) -> None:
     recorded = datetime(2024, 1, 12, 15, 45, tzinfo=timezone.utc)
-    store.record_integration_sync(recorded)
+    event_store.record_integration_sync(recorded)
 
     app = create_app(
         events_path_provider=lambda: tmp_path / "unused.jsonl",
         repository_factory=lambda: None,
         odoo_client_provider=lambda: None,
-        event_store_provider=lambda: EventStore(db_path),
+        event_store_provider=lambda: event_store,
     )
     client = TestClient(app)
 
@@ -1011,15 +1043,12 @@ def test_metrics_last_sync_reports_timestamp(tmp_path: Path) -> None:
     assert payload["meta"]["source"] == "database"
 
 
-def test_metrics_last_sync_handles_missing_record(tmp_path: Path) -> None:
-    db_path = tmp_path / "events.db"
-    run_migration(db_path)
-
+def test_metrics_last_sync_handles_missing_record(event_store: EventStore, tmp_path: Path) -> None:
     app = create_app(
         events_path_provider=lambda: tmp_path / "unused.jsonl",
         repository_factory=lambda: None,
         odoo_client_provider=lambda: None,
-        event_store_provider=lambda: EventStore(db_path),
+        event_store_provider=lambda: event_store,
     )
     client = TestClient(app)
 